@@ -21,6 +21,14 @@ def _check_stopwords(vernacular_name, latin_stopwords):
     else:
         return False
 
+
+def get_authorship_triple(line, author, latin_stopwords):
+    vernacular_name = line.rstrip("\n")
+    if _check_stopwords(vernacular_name, latin_stopwords):
+        return None
+    return "{}\tuses_vernacular_name\t{}\n".format(author.upper(), vernacular_name)
+
+
 def main():
     argparser = argparse.ArgumentParser(description='Extract triples AUTHOR uses_vernacular_name XY.')
 
@@ -60,12 +68,12 @@ def main():
         triples_counter = 0
         for line in infile:
             print(line)
-            vernacular_name = line.rstrip("\n")
-            if _check_stopwords(vernacular_name, latin_stopwords):
+            triple = get_authorship_triple(line, author, latin_stopwords)
+            if triple is None:
                 continue
             else:
                 triples_counter += 1
-                outfile.write("{}\tuses_vernacular_name\t{}\n".format(author.upper(), vernacular_name))
+                outfile.write(triple)
 
         print("Extracted triples (unique): {}".format(triples_counter))
 
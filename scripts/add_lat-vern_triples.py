@@ -14,6 +14,7 @@ import argparse
 from collections import defaultdict
 import json
 import os
+from normalize_tokens import ROMANS, clean_name
 
 
 def _check_stopwords(vernacular_name, latin_stopwords):
@@ -31,18 +32,6 @@ def _split_author(line):
         return False
 
 
-def _clean_string(name):
-    romans = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X", "XI", "XII", "XIII"]
-    print(name)
-    for n_rom in romans:
-        name = name.replace(n_rom, "")
-    print(name)
-    name = ''.join(c for c in name if c == "-" or c.isalpha() or c == " ")
-    print(name)
-
-    return name.lstrip(" ").rstrip(" ")
-
-
 def main():
     argparser = argparse.ArgumentParser(description='Extract triples AUTHOR uses_vernacular_name XY.')
 
@@ -86,13 +75,13 @@ def main():
 
                         if "," in bookname:
                             bname1, *rest_bnames = bookname.split(", ")
-                            bname1 = _clean_string(bname1)
+                            bname1 = clean_name(bname1)
                             #outfile.write("{}\thas_vernacular_name\t{}\n".format(formatted_latname, bname1))
                             if bname1:
                                 lat_booknames[formatted_latname].append(bname1)
 
                             for add_name in rest_bnames:
-                                add_name = _clean_string(add_name)
+                                add_name = clean_name(add_name)
                                 #outfile.write("{}\thas_vernacular_name\t{}\n".format(formatted_latname, add_name))
                                 if add_name:
                                     lat_booknames[formatted_latname].append(add_name)
@@ -102,7 +91,7 @@ def main():
                             #outfile.write("{}\thas_vernacular_name\t{}\n".format(formatted_latname, bookname))
 
                         else:
-                            bookname = _clean_string(bookname)
+                            bookname = clean_name(bookname)
                             #outfile.write("{}\thas_vernacular_name\t{}\n".format(formatted_latname, bookname))
                             if bookname:
                                 lat_booknames[formatted_latname].append(bookname)
@@ -120,7 +109,6 @@ def main():
                             continue
 
             else:
-                romans = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X", "XI", "XII", "XIII"]
                 if line == "\n":
                     continue
                 elif line.split(" ")[0].rstrip(",").rstrip(";").rstrip(",").isdigit():
@@ -128,20 +116,20 @@ def main():
                 elif line.isdigit():
                     continue
                 # @TODO: filter roman numbers
-                elif line in romans:
+                elif line in ROMANS:
                     continue
                 else:
                     # print("outside any", line, type(line))
                     if "," in line:
                         vern1, *rest_vern = line.split(", ")
-                        clean_vern = _clean_string(vern1)
+                        clean_vern = clean_name(vern1)
                         #outfile.write("{}\thas_vernacular_name\t{}\n".format(formatted_latname, clean_vern))
                         if clean_vern:
                             lat_vernnames[formatted_latname].append(clean_vern)
                             vern_latnames[clean_vern].append(formatted_latname)
 
                         for vern in rest_vern:
-                            clean_vern = _clean_string(vern)
+                            clean_vern = clean_name(vern)
                             #outfile.write("{}\thas_vernacular_name\t{}\n".format(formatted_latname, clean_vern))
 
                             if clean_vern:
@@ -0,0 +1,145 @@
+# usr/bin/env python3
+# author: Isabel Meraner
+# Project: Extraction of vernacular names from Bosshard (1978)
+# 2019
+
+"""
+Export the extracted information as flat, typed columnar tables (Arrow IPC and / or Parquet).
+
+Tables:
+occurrences: one row per name occurrence as generated by generate_rdf_triples.py
+             (name, status, taxon, canton, location, source)
+vern-lat, lat-vern, lat-book, vern-canton, vern-loc: the name maps from the json files, one row per pair
+
+All string columns are dictionary-encoded. The Arrow IPC files can be read zero-copy via memory mapping,
+see read_table().
+
+# How to run the code:
+$ python3 scripts/export_tables.py -j ./json/ -o ./tables/ -f both
+"""
+import argparse
+import os
+from collections import defaultdict
+import pyarrow as pa
+import pyarrow.parquet as pq
+from rdflib import URIRef
+from rdflib.namespace import RDF
+from generate_rdf_triples import load_json_data, load_geo_information, build_graph
+
+NAME_MAPS = ["vern-lat", "lat-vern", "lat-book", "vern-canton", "vern-loc"]
+
+OCCURRENCE_COLUMNS = [
+    ("name", RDF.value),
+    ("status", URIRef(":vernacularNameStatus")),
+    ("taxon", URIRef(":taxon")),
+    ("canton", URIRef(":areaCoarse")),
+    ("location", URIRef(":areaFine")),
+    ("source", URIRef(":source")),
+]
+
+STRING_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+
+class OccurrenceRows:
+    """Graph-like sink for build_graph(): collects the statements of every occurrence as one row."""
+
+    def __init__(self):
+        self.subjects = defaultdict(dict)
+
+    def add(self, triple):
+        s, p, o = triple
+        self.subjects[s][p] = o
+
+    def to_table(self):
+        columns = defaultdict(list)
+        for statements in self.subjects.values():
+            for column, predicate in OCCURRENCE_COLUMNS:
+                value = statements.get(predicate)
+                columns[column].append(str(value).lstrip(":") if value is not None else None)
+
+        schema = pa.schema([pa.field(column, STRING_TYPE) for column, _ in OCCURRENCE_COLUMNS])
+
+        return pa.Table.from_pydict({field.name: columns[field.name] for field in schema}, schema=schema)
+
+
+def name_map_table(name_map, map_name):
+    key_column, value_column = map_name.split("-")
+    keys = []
+    values = []
+    for key, map_values in name_map.items():
+        for value in map_values:
+            keys.append(key)
+            values.append(value)
+
+    schema = pa.schema([pa.field(key_column, STRING_TYPE), pa.field(value_column, STRING_TYPE)])
+    return pa.Table.from_pydict({key_column: keys, value_column: values}, schema=schema)
+
+
+def write_table(table, path_out, table_name, out_format):
+    if out_format in ("arrow", "both"):
+        with pa.OSFile(os.path.join(path_out, "{}.arrow".format(table_name)), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    if out_format in ("parquet", "both"):
+        pq.write_table(table, os.path.join(path_out, "{}.parquet".format(table_name)), use_dictionary=True)
+
+
+def read_table(path):
+    """Read an exported table; Arrow IPC files are memory-mapped, so the column buffers are not copied."""
+    if path.endswith(".parquet"):
+        return pq.read_table(path, memory_map=True)
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def main():
+    argparser = argparse.ArgumentParser(description='Export extracted names as columnar tables.')
+
+    argparser.add_argument(
+        '-j', '--json_directory',
+        type=str,
+        default='./../json/',
+        help='json_directory containing json files with triple information')
+
+    argparser.add_argument(
+        '-o', '--output_path',
+        type=str,
+        default='./../tables/',
+        help='pass output directory for the tables')
+
+    argparser.add_argument(
+        '-f', '--format',
+        type=str,
+        choices=['arrow', 'parquet', 'both'],
+        default='both',
+        help='write Arrow IPC files, Parquet files or both')
+
+    args = argparser.parse_args()
+    path_out = args.output_path
+    out_format = args.format
+    os.makedirs(path_out, exist_ok=True)
+
+    data_storage = load_json_data(args.json_directory)
+
+    geo_dir = "../resources/loc-cantons.tsv"
+    geo_storage = load_geo_information(geo_dir)
+
+    BASE_URL = "http://www.catalogueoflife.org/col/webservice?format=json&response=full&name="
+
+    occurrences = OccurrenceRows()
+    with open("../resources/authorship-vern-triples_unique_sorted.tsv", "r") as vern_names:
+        build_graph(occurrences, data_storage, geo_storage, vern_names, BASE_URL)
+
+    occurrence_table = occurrences.to_table()
+    write_table(occurrence_table, path_out, "occurrences", out_format)
+    print(">> occurrences: {} rows".format(occurrence_table.num_rows))
+
+    for map_name in NAME_MAPS:
+        table = name_map_table(data_storage[map_name], map_name)
+        write_table(table, path_out, map_name, out_format)
+        print(">> {}: {} rows".format(map_name, table.num_rows))
+
+
+if __name__ == '__main__':
+    main()
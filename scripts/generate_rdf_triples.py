@@ -23,18 +23,34 @@ Expected format:
 <http://vernbacular/394> :taxon <http://taxon-concept.plazi.org/id/Plantae/Viburnum_lantana> .
 <http://vernbacular/394> :vernacularNamestatus :bookName .
 
+Compact format (-c), name-level statements are shared by all occurrences of a name:
+<https://vernacular.plazi.org/name/17> rdf:type :VernacularName.
+<https://vernacular.plazi.org/name/17> rdf:value "Schnääball".
+<https://vernacular.plazi.org/name/17> :taxon <http://taxon-concept.plazi.org/id/Plantae/Viburnum_lantana> .
+<https://vernacular.plazi.org/name/17> :vernacularNamestatus :localName .
+<https://vernacular.plazi.org/name/17> :source <https://doi.org/10.5169/seals-664049> .
+<https://vernacular.plazi.org/name/17> :areaGlobal "DACHLS" .
+
+<https://vernacular.plazi.org/312> rdf:type :NameOccurrence.
+<https://vernacular.plazi.org/312> :name <https://vernacular.plazi.org/name/17> .
+<https://vernacular.plazi.org/312> :areaCoarse "Kanton Zürich" .
+<https://vernacular.plazi.org/312> :areaFine "Wädenswil" .
+
 # How to run the code:
 $ python3 scripts/generate_rdf_triples.py -j ./json/ -r ./triples/triples_v3_n3.ttl
+$ python3 scripts/generate_rdf_triples.py -j ./json/ -r ./triples/triples_compact_n3.ttl -c
 
 """
 import argparse
 import os
 import json
+import time
 import requests
 from collections import defaultdict
 from itertools import chain
 from rdflib import URIRef, Literal, Graph
 from rdflib.namespace import RDF
+from normalize_tokens import format_area
 import urllib.request
 
 
@@ -49,8 +65,9 @@ def load_geo_information(geo_dir):
 
 
 def load_json_data(json_dir):
+    # sorted file and name order, so that the statement stream (and its occurrence IDs) is the same on every run
     data_storage = dict()
-    for fn in os.listdir(json_dir):
+    for fn in sorted(os.listdir(json_dir)):
         with open(json_dir + fn, 'r') as json_f:
             data_storage[fn.split(".")[0]] = json.load(json_f)
 
@@ -60,10 +77,10 @@ def load_json_data(json_dir):
             data_storage["book-lat"][book_name].append(lat_name)
 
     for n, l in data_storage["vern-lat"].items():
-        data_storage["vern-lat"][n] = list(set(l))
+        data_storage["vern-lat"][n] = sorted(set(l))
 
     for n, l in data_storage["book-lat"].items():
-        data_storage["book-lat"][n] = list(set(l))
+        data_storage["book-lat"][n] = sorted(set(l))
 
     data_storage["names-lat"] = defaultdict(list)
     for k, v in chain(data_storage["book-lat"].items(), data_storage["vern-lat"].items()):
@@ -85,25 +102,9 @@ def has_latin_name(subdict, v_name):
     return False
 
 
-def add_graph_statements(g, ID_URI, v_name, Name_URI, data_storage, i_lat, areaCoarse, areaFine, BASE_URL):
-    DOI = "https://doi.org/10.5281/zenodo.293746"
-    source_URI = URIRef(":source")
-    status_URI = URIRef(":vernacularNameStatus")
-    DOI_URI = URIRef(DOI)
-    type_URI = URIRef(":NameOccurrence")
-    areaGlobal_URI = URIRef(":areaGlobal")
-    areaCoarse_URI = URIRef(":areaCoarse")
-    areaFine_URI = URIRef(":areaFine")
-    taxon_URI = URIRef(":taxon")
-    area_global = "DACHLS"  # Germany, Austris,Switzerland, Liechtenstein, South Tyrol
+def _get_taxon_URI(data_storage, v_name, i_lat, BASE_URL):
     base_plazi_taxon_url = "http://taxon-concept.plazi.org/id/Plantae/"
 
-    g.add((ID_URI, RDF.type, type_URI))
-    g.add((ID_URI, RDF.value, Literal(v_name)))
-    g.add((ID_URI, source_URI, DOI_URI))
-    g.add((ID_URI, status_URI, Name_URI))
-    g.add((ID_URI, areaGlobal_URI, Literal(area_global)))
-
     # ADD LATIN NAME
     plazi_uri = URIRef(
         "{}{}".format(base_plazi_taxon_url, data_storage["names-lat"][v_name][i_lat]))
@@ -127,10 +128,53 @@ def add_graph_statements(g, ID_URI, v_name, Name_URI, data_storage, i_lat, areaC
             link_uri = URIRef(data["results"][0]["url"])
             #print("found col db entry: ", data["results"][0]["url"])
 
+    #http://www.catalogueoflife.org/col/webservice?response=full&name=Drosophila+melanogaster
+    return link_uri
+
+
+def _add_name_statements(g, subject_URI, type_URI, v_name, Name_URI, link_uri):
+    DOI = "https://doi.org/10.5281/zenodo.293746"
+    source_URI = URIRef(":source")
+    status_URI = URIRef(":vernacularNameStatus")
+    DOI_URI = URIRef(DOI)
+    areaGlobal_URI = URIRef(":areaGlobal")
+    taxon_URI = URIRef(":taxon")
+    area_global = "DACHLS"  # Germany, Austris,Switzerland, Liechtenstein, South Tyrol
 
+    g.add((subject_URI, RDF.type, type_URI))
+    g.add((subject_URI, RDF.value, Literal(v_name)))
+    g.add((subject_URI, source_URI, DOI_URI))
+    g.add((subject_URI, status_URI, Name_URI))
+    g.add((subject_URI, areaGlobal_URI, Literal(area_global)))
+    g.add((subject_URI, taxon_URI, link_uri))
+
+
+def add_graph_statements(g, ID_URI, v_name, Name_URI, data_storage, i_lat, areaCoarse, areaFine, BASE_URL,
+                         name_nodes=None):
+    """
+    Add the statements of one name occurrence to the graph.
+
+    If name_nodes is given (compact mode), the name-level statements (value, source, status, areaGlobal, taxon)
+    are only emitted once on a shared name node, which is looked up in / registered to name_nodes, and the
+    occurrence itself only keeps its type, links to that node and carries its area statements.
+    """
+    occurrence_type_URI = URIRef(":NameOccurrence")
+    name_type_URI = URIRef(":VernacularName")
+    name_link_URI = URIRef(":name")
+    areaCoarse_URI = URIRef(":areaCoarse")
+    areaFine_URI = URIRef(":areaFine")
 
-    #http://www.catalogueoflife.org/col/webservice?response=full&name=Drosophila+melanogaster
-    g.add((ID_URI, taxon_URI, link_uri))
+    if name_nodes is None:
+        link_uri = _get_taxon_URI(data_storage, v_name, i_lat, BASE_URL)
+        _add_name_statements(g, ID_URI, occurrence_type_URI, v_name, Name_URI, link_uri)
+    else:
+        name_key = (v_name, Name_URI, data_storage["names-lat"][v_name][i_lat])
+        if name_key not in name_nodes:
+            name_nodes[name_key] = _build_ID("name/{}".format(len(name_nodes) + 1))
+            link_uri = _get_taxon_URI(data_storage, v_name, i_lat, BASE_URL)
+            _add_name_statements(g, name_nodes[name_key], name_type_URI, v_name, Name_URI, link_uri)
+        g.add((ID_URI, RDF.type, occurrence_type_URI))
+        g.add((ID_URI, name_link_URI, name_nodes[name_key]))
 
     # ADD CANTON
     g.add((ID_URI, areaCoarse_URI, Literal(areaCoarse)))
@@ -139,22 +183,21 @@ def add_graph_statements(g, ID_URI, v_name, Name_URI, data_storage, i_lat, areaC
     g.add((ID_URI, areaFine_URI, Literal(areaFine)))
 
 
-def add_information(g, data_storage, geo_storage, v_name, ID, Name_URI, standalone_loc, BASE_URL):
+def add_information(g, data_storage, geo_storage, v_name, ID, Name_URI, standalone_loc, BASE_URL, name_nodes=None):
     if has_latin_name(data_storage["names-lat"], v_name):
         #print("has lat name!", v_name, data_storage["names-lat"][v_name])
+        # format the cantons / locations once per name instead of once per nested iteration
+        areasCoarse = [format_area(area) for area in data_storage["vern-canton"].get(v_name, [])]
+        areasFine = [format_area(area) for area in data_storage["vern-loc"].get(v_name, [])]
         for i_lat, lat_name in enumerate(data_storage["names-lat"][v_name]):
             #print(i_lat, v_name, lat_name)
 
-            if data_storage["vern-canton"].get(v_name):
-                for i_canton, areaCoarse in enumerate(data_storage["vern-canton"][v_name]):
-                    areaCoarse = areaCoarse.replace("_", " ")
-                    areaCoarse = " ".join([part.capitalize() for part in areaCoarse.split(" ")])
+            if areasCoarse:
+                for i_canton, areaCoarse in enumerate(areasCoarse):
                     #print("adding canton {} for name {}".format(i_canton, areaCoarse, v_name))
 
-                    if data_storage["vern-loc"].get(v_name):
-                        for i_loc, areaFine in enumerate(data_storage["vern-loc"][v_name]):
-                            areaFine = areaFine.replace("_", " ")
-                            areaFine = " ".join([part.capitalize() for part in areaFine.split(" ")])
+                    if areasFine:
+                        for i_loc, areaFine in enumerate(areasFine):
                             #print("adding locaton {} for name {}".format(i_loc, areaFine, v_name))
 
                             # print(areaFine, areaCoarse, geo_storage[areaCoarse])
@@ -164,7 +207,7 @@ def add_information(g, data_storage, geo_storage, v_name, ID, Name_URI, standalo
                                 # print("initialising instance for: ", v_name, Name_URI, areaCoarse, areaFine,
                                 #       data_storage["names-lat"][v_name][i_lat])
                                 add_graph_statements(g, ID_URI, v_name, Name_URI, data_storage, i_lat, areaCoarse,
-                                                     areaFine, BASE_URL)
+                                                     areaFine, BASE_URL, name_nodes)
                             else:
                                 # print("not found in geo storage: ", i_loc, areaFine)
                                 #continue
@@ -180,7 +223,7 @@ def add_information(g, data_storage, geo_storage, v_name, ID, Name_URI, standalo
                                             ID += 1
                                             ID_URI = _build_ID(ID)
                                             add_graph_statements(g, ID_URI, v_name, Name_URI, data_storage, i_lat, "",
-                                                                 areaFine, BASE_URL)
+                                                                 areaFine, BASE_URL, name_nodes)
                                             standalone_loc[v_name].append(areaFine)
                                 else:
                                     FOUND = False
@@ -191,7 +234,7 @@ def add_information(g, data_storage, geo_storage, v_name, ID, Name_URI, standalo
                                         ID += 1
                                         ID_URI = _build_ID(ID)
                                         add_graph_statements(g, ID_URI, v_name, Name_URI, data_storage, i_lat, "",
-                                                             areaFine, BASE_URL)
+                                                             areaFine, BASE_URL, name_nodes)
                                         standalone_loc[v_name].append(areaFine)
 
 
@@ -206,6 +249,43 @@ def get_booknames(data_storage):
     return all_booknames
 
 
+def build_graph(g, data_storage, geo_storage, vern_names, BASE_URL, name_nodes=None):
+    """
+    Add the statements of all name occurrences to g. g can be any object providing an rdflib-like add() method,
+    which allows streaming the statements somewhere else than into an in-memory graph.
+    """
+    localName_URI = URIRef(":localName")
+    bookName_URI = URIRef(":bookName")
+
+    found_booknames = set()
+    standalone_loc = defaultdict(list)
+    all_booknames = get_booknames(data_storage)
+
+    ID = 0
+    for line in vern_names:
+        author, pred, v_name = line.rstrip("\n").split("\t")
+
+        if v_name in all_booknames:
+            #print(">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>> bookname", v_name)
+            found_booknames.add(v_name)
+            ID = add_information(g, data_storage, geo_storage, v_name, ID, bookName_URI, standalone_loc, BASE_URL,
+                                 name_nodes)
+        else:
+            #print(">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>> local name", v_name)
+            ID = add_information(g, data_storage, geo_storage, v_name, ID, localName_URI, standalone_loc, BASE_URL,
+                                 name_nodes)
+
+    missing_booknames = all_booknames.difference(found_booknames)
+    for scientific_name, booknames in data_storage["lat-book"].items():
+        for bookname in booknames:
+            if bookname in missing_booknames:
+                #print(">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>> missing bookname", bookname)
+                ID = add_information(g, data_storage, geo_storage, bookname, ID, bookName_URI, standalone_loc,
+                                     BASE_URL, name_nodes)
+
+    return ID
+
+
 def main():
     argparser = argparse.ArgumentParser(description='Extract triples CANTON uses_vernacular_name XY')
 
@@ -221,49 +301,34 @@ def main():
         default='./../triples/triples_v5_n3.ttl',
         help='path for rdf output file')
 
+    argparser.add_argument(
+        '-c', '--compact',
+        action='store_true',
+        help='emit name-level statements once on a shared name node instead of on every occurrence')
+
     args = argparser.parse_args()
     json_dir = args.json_directory
     rdf_target = args.rdf_outfile
 
     data_storage = load_json_data(json_dir)
 
-    localName_URI = URIRef(":localName")
-    bookName_URI = URIRef(":bookName")
-
     geo_dir = "../resources/loc-cantons.tsv"
     geo_storage = load_geo_information(geo_dir)
 
     BASE_URL = "http://www.catalogueoflife.org/col/webservice?format=json&response=full&name="
 
-    found_booknames = set()
-    standalone_loc = defaultdict(list)
-    all_booknames = get_booknames(data_storage)
+    name_nodes = dict() if args.compact else None
 
     g = Graph()
     # http://purl.org/net/vern-names
 
     with open("../resources/authorship-vern-triples_unique_sorted.tsv", "r") as vern_names:
-        ID = 0
-        for line in vern_names:
-            author, pred, v_name = line.rstrip("\n").split("\t")
-
-            if v_name in all_booknames:
-                #print(">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>> bookname", v_name)
-                found_booknames.add(v_name)
-                ID = add_information(g, data_storage, geo_storage, v_name, ID, bookName_URI, standalone_loc, BASE_URL)
-            else:
-                #print(">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>> local name", v_name)
-                ID = add_information(g, data_storage, geo_storage, v_name, ID, localName_URI, standalone_loc, BASE_URL)
-
-        missing_booknames = all_booknames.difference(found_booknames)
-        for scientific_name, booknames in data_storage["lat-book"].items():
-            for bookname in booknames:
-                if bookname in missing_booknames:
-                    #print(">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>> missing bookname", bookname)
-                    ID = add_information(g, data_storage, geo_storage, bookname, ID, bookName_URI, standalone_loc, BASE_URL)
+        build_graph(g, data_storage, geo_storage, vern_names, BASE_URL, name_nodes)
 
+    start = time.time()
     g.serialize(destination=rdf_target, format='n3')  # format='turtle'
-    print(">> final graph has been serialized with '{}' statements.".format(len(g)))
+    print(">> final graph has been serialized with '{}' statements in {:.2f}s ({} bytes).".format(
+        len(g), time.time() - start, os.path.getsize(rdf_target)))
 
 
 if __name__ == '__main__':
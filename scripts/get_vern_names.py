@@ -17,6 +17,7 @@ import json
 import os
 from tika import parser
 from collections import defaultdict
+from normalize_tokens import clean_location, is_invalid_name
 
 
 def extract_from_pdf(input_file, output_file):
@@ -31,6 +32,8 @@ def get_triples(geo, geo_stopwords, latin_stopwords):
     geo_triples_counter = 0
     total_geotriples = set()
     vern_loc = defaultdict(list)
+    # triple added by the last data line (None if that line added nothing new)
+    last_added = None
 
     for line in geo:
         split_line = line.rstrip("\n").rstrip(",").split(" ")
@@ -39,10 +42,10 @@ def get_triples(geo, geo_stopwords, latin_stopwords):
             dictio[" ".join(split_line)] += 1
             canton = " ".join(split_line)
             if canton == "KANTON BASEL-LANDSCHAFT":
-                if total_geotriples:
-                    total_geotriples.pop()
-                else:
-                    continue
+                # the line before is the species heading (e.g. "Pimis montana Mill. Berg-Föhre"), drop its triple
+                if last_added is not None:
+                    total_geotriples.discard(last_added)
+                last_added = None
 
         elif line == "\n":
             continue
@@ -50,6 +53,7 @@ def get_triples(geo, geo_stopwords, latin_stopwords):
             continue
         else:
             # print(line)
+            last_added = None
             split_line = line.rstrip("\n").split(" ")
             if len(split_line) < 2:
                 print(line)
@@ -58,15 +62,18 @@ def get_triples(geo, geo_stopwords, latin_stopwords):
                 vernacular_name = " ".join(split_line[:2])
                 location_fine = split_line[2:]
                 print("Loc1: {}".format(location_fine))
-                loc = _clean_location(location_fine)
+                loc = clean_location(location_fine)
                 print("Loc2: {}".format(loc))
 
-                if _check_vern_name(vernacular_name):
+                if is_invalid_name(vernacular_name):
                     continue
                 elif _check_stopwords(vernacular_name, geo_stopwords, latin_stopwords):
                     continue
                 else:
-                    total_geotriples.add("{}\tuses_vernacular_name\t{}\n".format(canton, vernacular_name))
+                    triple = "{}\tuses_vernacular_name\t{}\n".format(canton, vernacular_name)
+                    if triple not in total_geotriples:
+                        total_geotriples.add(triple)
+                        last_added = triple
                     if loc:
                         vern_loc[vernacular_name].append(loc)
                     geo_triples_counter += 1
@@ -74,28 +81,24 @@ def get_triples(geo, geo_stopwords, latin_stopwords):
                 vernacular_name = split_line[0]
                 location_fine = split_line[1:]
                 print("Loc1: {}".format(location_fine))
-                loc = _clean_location(location_fine)
+                loc = clean_location(location_fine)
                 print("Loc2: {}".format(loc))
 
-                if _check_vern_name(vernacular_name):
+                if is_invalid_name(vernacular_name):
                     continue
                 elif _check_stopwords(vernacular_name, geo_stopwords, latin_stopwords):
                     continue
                 else:
-                    total_geotriples.add("{}\tuses_vernacular_name\t{}\n".format(canton, vernacular_name))
+                    triple = "{}\tuses_vernacular_name\t{}\n".format(canton, vernacular_name)
+                    if triple not in total_geotriples:
+                        total_geotriples.add(triple)
+                        last_added = triple
                     if loc:
                         vern_loc[vernacular_name].append(loc)
 
                     geo_triples_counter += 1
 
-    return total_geotriples, geo_triples_counter, dictio, vern_loc
-
-
-def _check_vern_name(vernacular_name):
-    if "Bez." in vernacular_name or vernacular_name.endswith(",") or vernacular_name.isdigit():
-        return True
-    else:
-        return False
+    return total_geotriples, geo_triples_counter, dictio, vern_loc, last_added
 
 
 def _check_stopwords(vernacular_name, geo_stopwords, latin_stopwords):
@@ -121,20 +124,6 @@ def _clean_dict(vern_loc):
 
     return vern_loc2
 
-def _clean_location(loc):
-    romans = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X", "XI", "XII", "XIII"]
-
-    if len(loc) == 1:
-        if loc[0] in romans:
-            loc = []
-    else:
-        loc = [el for el in loc if el not in romans]
-        loc = [el for el in loc if not any(el1.isdigit() for el1 in el)]
-
-    if loc:
-        return "_".join(loc)
-    return loc
-
 def main():
     argparser = argparse.ArgumentParser(description='Extract triples CANTON uses_vernacular_name XY')
 
@@ -189,7 +178,7 @@ def main():
 
     # 2. get geo-vern triples from pdf
     with open(geo_file, "r") as geo, open(triple_path_geo, "w", encoding="utf-8") as triples_geo:
-        total_geotriples, geo_triples_counter, dictio, vern_loc = get_triples(geo, geo_stopwords, latin_stopwords)
+        total_geotriples, geo_triples_counter, dictio, vern_loc, _ = get_triples(geo, geo_stopwords, latin_stopwords)
 
         print("Extracted names from cantons: \n", dictio, end="\n\n")
         print("Extracted triples (not unique): {}".format(geo_triples_counter))
@@ -0,0 +1,57 @@
+# usr/bin/env python3
+# author: Isabel Meraner
+# Project: Extraction of vernacular names from Bosshard (1978)
+# 2019
+
+"""
+Shared normalization rules for location, canton and name tokens.
+
+The same cantons, locations and names occur over and over again in Bosshard, so the rules are memoized with
+lru_cache on the token (or name) they are applied to; repeated tokens are only cleaned once. Used by
+get_vern_names.py, add_lat-vern_triples.py and generate_rdf_triples.py.
+"""
+from functools import lru_cache
+
+ROMANS = frozenset(["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X", "XI", "XII", "XIII"])
+
+# removing all roman numerals one after the other ("I", "II", ..., "XIII") removes every "I", "V" and "X"
+_ROMAN_CHARS = str.maketrans("", "", "IVX")
+
+
+@lru_cache(maxsize=None)
+def _is_noise_token(token):
+    return token in ROMANS or any(c.isdigit() for c in token)
+
+
+def clean_location(loc):
+    """Remove roman numerals and numbers from the location tokens of a line and join them with "_"."""
+    if len(loc) == 1:
+        if loc[0] in ROMANS:
+            return []
+        return loc[0]
+
+    loc = [el for el in loc if not _is_noise_token(el)]
+    if loc:
+        return "_".join(loc)
+    return loc
+
+
+@lru_cache(maxsize=None)
+def is_invalid_name(vernacular_name):
+    return "Bez." in vernacular_name or vernacular_name.endswith(",") or vernacular_name.isdigit()
+
+
+@lru_cache(maxsize=None)
+def clean_name(name):
+    """Remove roman numerals and everything but letters, "-" and " " from a vernacular / book name."""
+    name = name.translate(_ROMAN_CHARS)
+    name = ''.join(c for c in name if c == "-" or c.isalpha() or c == " ")
+
+    return name.lstrip(" ").rstrip(" ")
+
+
+@lru_cache(maxsize=None)
+def format_area(area):
+    """Format a canton / location as stored in the json files for the graph, e.g. "ob._emmental" -> "Ob. Emmental"."""
+    area = area.replace("_", " ")
+    return " ".join([part.capitalize() for part in area.split(" ")])
@@ -0,0 +1,258 @@
+# usr/bin/env python3
+# author: Isabel Meraner
+# Project: Extraction of vernacular names from Bosshard (1978)
+# 2019
+
+"""
+Stream the rdf-triples generated by generate_rdf_triples.py to a SPARQL endpoint instead of serializing
+one large file.
+
+The statements are collected in batches, one statement per line, and uploaded over a pooled keep-alive HTTP
+session with several batches in flight. Either the SPARQL 1.1 Graph Store Protocol (POST of text/turtle) or
+SPARQL 1.1 Update (INSERT DATA) is used. The graph uses relative IRIs like <:taxon>, which N-Triples does not
+allow, Turtle and SPARQL resolve them like in the .ttl files written by generate_rdf_triples.py. Re-sending a batch is idempotent (RDF graphs are sets of statements),
+so failed batches are simply retried. Finished batches are recorded with a hash of their content in a checkpoint
+file, an interrupted upload can be restarted with the same arguments and skips all batches that already arrived.
+If a batch differs from the one recorded under its index (other json data, other batch size), the upload stops
+instead of skipping it.
+
+# How to run the code:
+$ python3 scripts/publish_triples.py -j ./json/ -e http://localhost:3030/vernacular/data -p gsp -k ./triples/upload-checkpoint.json
+$ python3 scripts/publish_triples.py -j ./json/ -e http://localhost:3030/vernacular/update -p update -g https://vernacular.plazi.org/graph
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from generate_rdf_triples import load_json_data, load_geo_information, build_graph
+
+
+class BatchUploader:
+    """Graph-like sink for build_graph(): collects the added statements and uploads them batch-wise."""
+
+    def __init__(self, endpoint, protocol="gsp", graph_uri="", batch_size=5000, workers=4, retries=3,
+                 timeout=60, checkpoint=""):
+        self.endpoint = endpoint
+        self.protocol = protocol
+        self.graph_uri = graph_uri
+        self.batch_size = batch_size
+        self.retries = retries
+        self.timeout = timeout
+        self.checkpoint = checkpoint
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        # bounds the number of batches that are waiting for / being uploaded
+        self.in_flight = threading.BoundedSemaphore(2 * workers)
+        self.lock = threading.Lock()
+
+        self.batch = []
+        self.batch_index = 0
+        self.futures = []
+        self.done_batches = self._load_checkpoint()
+        self.uploaded = 0
+        self.skipped = 0
+
+    def _load_checkpoint(self):
+        """Return the uploaded batches from the checkpoint file as {index: content hash}."""
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            with open(self.checkpoint, "r") as fp:
+                return {int(index): batch_hash for index, batch_hash in json.load(fp)["done_batches"].items()}
+        return dict()
+
+    def _write_checkpoint(self):
+        tmp_path = "{}.tmp".format(self.checkpoint)
+        with open(tmp_path, "w") as fp:
+            json.dump({"done_batches": {str(index): self.done_batches[index] for index in sorted(self.done_batches)}},
+                      fp)
+        os.replace(tmp_path, self.checkpoint)
+
+    def add(self, triple):
+        self.batch.append(triple)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def _check_failed(self):
+        """Re-raise the error of the first failed upload, so that no further batches are sent to a dead endpoint."""
+        pending = []
+        for future in self.futures:
+            if not future.done():
+                pending.append(future)
+            elif future.exception() is not None:
+                raise future.exception()
+        self.futures = pending
+
+    def flush(self):
+        self._check_failed()
+        if not self.batch:
+            return
+        batch, index = self.batch, self.batch_index
+        self.batch = []
+        self.batch_index += 1
+
+        statements = "".join("{} {} {} .\n".format(s.n3(), p.n3(), o.n3()) for s, p, o in batch)
+        batch_hash = hashlib.sha1(statements.encode("utf-8")).hexdigest()
+        if index in self.done_batches:
+            if self.done_batches[index] != batch_hash:
+                raise ValueError("batch {} differs from the one recorded in {}, the statements changed since the "
+                                 "interrupted upload; remove the checkpoint to upload again".format(index,
+                                                                                                   self.checkpoint))
+            self.skipped += len(batch)
+            return
+
+        self.in_flight.acquire()
+        future = self.executor.submit(self._upload, index, batch_hash, statements, len(batch))
+        future.add_done_callback(lambda _: self.in_flight.release())
+        self.futures.append(future)
+
+    def _build_request(self, statements):
+        if self.protocol == "gsp":
+            params = {"graph": self.graph_uri} if self.graph_uri else {"default": ""}
+            headers = {"Content-Type": "text/turtle; charset=utf-8"}
+            return params, headers, statements.encode("utf-8")
+
+        if self.graph_uri:
+            update = "INSERT DATA {{ GRAPH <{}> {{\n{}}} }}".format(self.graph_uri, statements)
+        else:
+            update = "INSERT DATA {{\n{}}}".format(statements)
+        headers = {"Content-Type": "application/sparql-update; charset=utf-8"}
+        return {}, headers, update.encode("utf-8")
+
+    def _upload(self, index, batch_hash, statements, n_statements):
+        params, headers, body = self._build_request(statements)
+
+        for attempt in range(self.retries + 1):
+            try:
+                resp = self.session.post(self.endpoint, params=params, headers=headers, data=body,
+                                         timeout=self.timeout)
+                if resp.status_code < 300:
+                    break
+                # client errors will not go away by re-sending the same batch
+                if 400 <= resp.status_code < 500 and resp.status_code not in (408, 429):
+                    resp.raise_for_status()
+                error = requests.HTTPError("{} for batch {}".format(resp.status_code, index), response=resp)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if attempt == self.retries:
+                raise error
+            time.sleep(0.5 * 2 ** attempt)
+
+        with self.lock:
+            self.uploaded += n_statements
+            self.done_batches[index] = batch_hash
+            if self.checkpoint:
+                self._write_checkpoint()
+
+    def close(self, cancel=False):
+        """
+        Upload the last batch and wait for all uploads, re-raising the first failed one. With cancel, or if an upload
+        failed, the batches that are not being uploaded yet are dropped.
+        """
+        try:
+            if not cancel:
+                self.flush()
+        except BaseException:
+            cancel = True
+            raise
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=cancel)
+            self.session.close()
+        if not cancel:
+            self._check_failed()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close(cancel=exc_type is not None)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description='Upload generated rdf triples to a SPARQL endpoint.')
+
+    argparser.add_argument(
+        '-j', '--json_directory',
+        type=str,
+        default='./../json/',
+        help='json_directory containing json files with triple information')
+
+    argparser.add_argument(
+        '-e', '--endpoint',
+        type=str,
+        default='http://localhost:3030/vernacular/data',
+        help='pass graph store (gsp) or update endpoint URL')
+
+    argparser.add_argument(
+        '-p', '--protocol',
+        type=str,
+        choices=['gsp', 'update'],
+        default='gsp',
+        help='upload via SPARQL 1.1 Graph Store Protocol or SPARQL 1.1 Update')
+
+    argparser.add_argument(
+        '-g', '--graph',
+        type=str,
+        default='',
+        help='pass named graph URI (default graph if empty)')
+
+    argparser.add_argument(
+        '-b', '--batch_size',
+        type=int,
+        default=5000,
+        help='number of statements per request')
+
+    argparser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=4,
+        help='number of parallel requests')
+
+    argparser.add_argument(
+        '--retries',
+        type=int,
+        default=3,
+        help='number of retries per batch')
+
+    argparser.add_argument(
+        '-k', '--checkpoint',
+        type=str,
+        default='',
+        help='pass checkpoint file to resume interrupted uploads')
+
+    argparser.add_argument(
+        '-c', '--compact',
+        action='store_true',
+        help='emit name-level statements once on a shared name node instead of on every occurrence')
+
+    args = argparser.parse_args()
+
+    data_storage = load_json_data(args.json_directory)
+
+    geo_dir = "../resources/loc-cantons.tsv"
+    geo_storage = load_geo_information(geo_dir)
+
+    BASE_URL = "http://www.catalogueoflife.org/col/webservice?format=json&response=full&name="
+
+    name_nodes = dict() if args.compact else None
+
+    start = time.time()
+    with BatchUploader(args.endpoint, args.protocol, args.graph, args.batch_size, args.workers, args.retries,
+                       checkpoint=args.checkpoint) as uploader:
+        with open("../resources/authorship-vern-triples_unique_sorted.tsv", "r") as vern_names:
+            build_graph(uploader, data_storage, geo_storage, vern_names, BASE_URL, name_nodes)
+    elapsed = time.time() - start
+
+    print(">> uploaded '{}' statements in {} batches ({} skipped from checkpoint) in {:.2f}s: {:.0f} triples/s".format(
+        uploader.uploaded, uploader.batch_index, uploader.skipped, elapsed, uploader.uploaded / max(elapsed, 1e-9)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+# usr/bin/env python3
+# author: Isabel Meraner
+# Project: Extraction of vernacular names from Bosshard (1978)
+# 2019
+
+"""
+Reconstruct the reading order of Bosshard's multi-column pages from the character coordinates in the XML output
+of pdf2txt (pdfminer, as read by get_names_from_xml.py) or in TETML.
+
+For each page the character boxes are loaded into NumPy arrays, rows are found as jumps in the baseline and
+gutters as vertical strips that are empty in most rows. Lines running across a gutter (titles, captions) are
+kept whole and do not hide it. A gutter only separates page columns if the rows on its two sides are set
+independently; where the cells on both sides share their baselines, as in Bosshard's tables
+(MUNDARTNAMEN ORTE EHB INDEX), every row stays one line. Columns whose baselines coincide are therefore read as
+table rows as well. The page is then written block by block (between spanning lines), column by column, top to
+bottom, so that the output can be read by the existing text-based extractors (get_vern_names.py,
+add_lat-vern_triples.py, ...).
+
+pdf2txt writes one <text bbox="x0,y0,x1,y1" size=...> element per character:
+$ pdf2txt.py -t xml -o resources/pdf2txt_bosshard_extracted.xml bosshard_1978_OCR.pdf
+TETML only has glyph coordinates if TET was run with glyph geometry, e.g.
+$ tet -m wordplus --tetml ... bosshard_1978_OCR.pdf
+Pages without coordinates (like in resources/bosshard_1978_OCR.tetml, granularity=line) are written in line order.
+
+# How to run the code:
+$ python3 scripts/reconstruct_columns.py -i resources/pdf2txt_bosshard_extracted.xml -o resources/bosshard_1978_columns.txt
+$ python3 scripts/reconstruct_columns.py -i resources/bosshard_1978_OCR.tetml -o resources/bosshard_1978_columns.txt
+"""
+import argparse
+import time
+import lxml.etree as ET
+import numpy as np
+
+TET_NS = "{http://www.pdflib.com/XML/TET3/TET-3.0}"
+
+
+def _to_arrays(values):
+    if not values:
+        return None
+
+    x, y, width, size, chars = zip(*values)
+    return np.array(x), np.array(y), np.array(width), np.array(size), np.array(chars, dtype=object)
+
+
+def _load_glyphs(page):
+    """Load the glyphs of a TETML page as arrays (x, y, width, size, chars)."""
+    glyphs = page.iter(TET_NS + "Glyph")
+    return _to_arrays([(float(glyph.get("x")), float(glyph.get("y")), float(glyph.get("width", 0)),
+                        float(glyph.get("size", 0)), glyph.text or "") for glyph in glyphs])
+
+
+def _load_chars(page):
+    """Load the characters of a pdf2txt page as arrays (x, y, width, size, chars); y is the bottom of the box."""
+    values = []
+    # spaces and line breaks added by the layout analysis have no bbox
+    for text in page.iter("text"):
+        bbox = text.get("bbox")
+        if bbox is None:
+            continue
+        x0, y0, x1, y1 = map(float, bbox.split(","))
+        values.append((x0, y0, x1 - x0, float(text.get("size", y1 - y0)), text.text or ""))
+
+    return _to_arrays(values)
+
+
+def _find_rows(y, tolerance):
+    """Return the row of every glyph, numbered from top to bottom; a new row starts where the baseline jumps."""
+    # PDF y axis points up
+    order = np.argsort(-y, kind="stable")
+    new_row = np.zeros(len(order), dtype=bool)
+    new_row[1:] = np.diff(-y[order]) > tolerance
+    rows = np.empty(len(order), dtype=int)
+    rows[order] = np.cumsum(new_row)
+
+    return rows
+
+
+def _find_gutters(x, width, rows, page_width, min_gap, span_fraction):
+    """
+    Return the (start, end) x positions of the vertical strips wider than min_gap that are empty in all but
+    span_fraction of the rows. Lines running across a gutter (titles, captions) therefore do not hide it.
+    """
+    n_rows = rows.max() + 1
+    n_bins = int(np.ceil(page_width)) + 1
+    starts = np.clip(np.floor(x).astype(int), 0, n_bins - 1)
+    ends = np.clip(np.ceil(x + width).astype(int), 0, n_bins - 1)
+
+    # rows covering each 1pt bin, via +1 / -1 at the glyph borders per row
+    borders = np.zeros((n_rows, n_bins + 1), dtype=int)
+    np.add.at(borders, (rows, starts), 1)
+    np.add.at(borders, (rows, ends + 1), -1)
+    row_coverage = (np.cumsum(borders[:, :-1], axis=1) > 0).sum(axis=0)
+    used = row_coverage > span_fraction * n_rows
+
+    # runs of free bins, only those between used bins can separate columns
+    changes = np.flatnonzero(np.diff(used.astype(np.int8)))
+    gap_starts = changes[used[changes]] + 1
+    gap_ends = changes[~used[changes]] + 1
+    if not len(gap_starts) or not len(gap_ends):
+        return []
+    gap_starts, gap_ends = gap_starts[gap_starts < gap_ends[-1]], gap_ends[gap_ends > gap_starts[0]]
+    wide = (gap_ends - gap_starts) > min_gap
+
+    return list(zip(gap_starts[wide], gap_ends[wide]))
+
+
+def _row_sides(x, width, rows, n_rows, left, bound, right, min_gap):
+    """
+    Return per row whether it has glyphs in [left, bound) and in [bound, right), and whether its text runs across
+    bound without a gap of min_gap (a line spanning the gutter, not two cells or columns).
+    """
+    centers = x + width / 2
+    in_left = (centers >= left) & (centers < bound)
+    in_right = (centers >= bound) & (centers < right)
+
+    has_left = np.bincount(rows[in_left], minlength=n_rows) > 0
+    has_right = np.bincount(rows[in_right], minlength=n_rows) > 0
+    left_end = np.full(n_rows, -np.inf)
+    np.maximum.at(left_end, rows[in_left], (x + width)[in_left])
+    right_start = np.full(n_rows, np.inf)
+    np.minimum.at(right_start, rows[in_right], x[in_right])
+    spanning = has_left & has_right & (right_start - left_end < min_gap)
+
+    return has_left, has_right, spanning
+
+
+def _find_column_bounds(x, width, rows, page_width, min_gap, span_fraction, shared_fraction):
+    """
+    Return the x positions separating the page columns and per row whether it spans them.
+
+    A gutter only separates page columns if the rows on its two sides are independent: in a table (e.g.
+    MUNDARTNAMEN ORTE EHB INDEX) the cells of a row share the baseline, so a gutter where more than
+    shared_fraction of the rows on its right have cells on both sides stays within the rows.
+    """
+    n_rows = rows.max() + 1
+    candidates = [end for _, end in _find_gutters(x, width, rows, page_width, min_gap, span_fraction)]
+
+    bounds = []
+    spanning = np.zeros(n_rows, dtype=bool)
+    for i, bound in enumerate(candidates):
+        left = bounds[-1] if bounds else -np.inf
+        right = candidates[i + 1] if i + 1 < len(candidates) else np.inf
+        has_left, has_right, spans = _row_sides(x, width, rows, n_rows, left, bound, right, min_gap)
+        right_rows = has_right & ~spans
+        if not right_rows.any() or (has_left & right_rows).sum() > shared_fraction * right_rows.sum():
+            continue
+        bounds.append(bound)
+        # a row spans bound if its text runs across it, with all content of both columns
+        spanning |= _row_sides(x, width, rows, n_rows, -np.inf, bound, np.inf, min_gap)[2]
+
+    return np.array(bounds, dtype=float), spanning
+
+
+def reconstruct_page(x, y, width, size, chars, page_width, col_gap=1.5, row_tolerance=0.5, space_gap=0.25,
+                     span_fraction=0.25, shared_fraction=0.5):
+    """
+    Return the lines of a page in reading order: lines spanning the columns (titles) in place, between them
+    column by column, top to bottom. Table rows stay one line.
+    """
+    median_size = np.median(size[size > 0]) if np.any(size > 0) else 10.0
+    rows = _find_rows(y, row_tolerance * median_size)
+    bounds, spanning = _find_column_bounds(x, width, rows, page_width, col_gap * median_size, span_fraction,
+                                           shared_fraction)
+
+    # blocks: runs of rows between spanning rows, each spanning row is a block of its own (with column 0)
+    row_spanning = spanning.astype(np.int8)
+    new_block = np.ones(len(spanning), dtype=bool)
+    new_block[1:] = (row_spanning[1:] | row_spanning[:-1]) != 0
+    blocks = np.cumsum(new_block)[rows]
+    columns = np.where(spanning[rows], 0, np.searchsorted(bounds, x + width / 2, side="right"))
+
+    # one line per row and column, ordered by block, column and row
+    order = np.lexsort((rows, columns, blocks))
+    line_ids = np.empty(len(order), dtype=int)
+    new_line = np.ones(len(order), dtype=bool)
+    new_line[1:] = ((np.diff(blocks[order]) != 0) | (np.diff(columns[order]) != 0) | (np.diff(rows[order]) != 0))
+    line_ids[order] = np.cumsum(new_line)
+
+    # left to right within each line, with a space wherever the glyphs are further apart than a space would be
+    order = np.lexsort((x, line_ids))
+    x, width, size, chars, line_ids = x[order], width[order], size[order], chars[order], line_ids[order]
+    line_start = np.ones(len(order), dtype=bool)
+    line_start[1:] = line_ids[1:] != line_ids[:-1]
+    gaps = np.zeros(len(order))
+    gaps[1:] = x[1:] - (x[:-1] + width[:-1])
+    needs_space = ~line_start & (gaps > space_gap * np.where(size > 0, size, median_size))
+    needs_space[1:] &= (chars[1:] != " ") & (chars[:-1] != " ")
+
+    chars = np.where(needs_space, " " + chars, chars)
+    lines = np.split(chars, np.flatnonzero(line_start)[1:])
+
+    return ["".join(line).strip(" ") for line in lines]
+
+
+def iter_pages(xml_file, **kwargs):
+    """Yield (page number, lines) for every page of a pdf2txt XML or TETML file, streaming the XML page by page."""
+    for _, page in ET.iterparse(xml_file, tag=("page", TET_NS + "Page")):
+        if page.tag == "page":
+            chars = _load_chars(page)
+            page_number = int(page.get("id"))
+            page_width = float(page.get("bbox").split(",")[2])
+            line_tag, text_tag = "textline", "text"
+        else:
+            chars = _load_glyphs(page)
+            page_number = int(page.get("number"))
+            page_width = float(page.get("width"))
+            line_tag, text_tag = TET_NS + "Line", TET_NS + "Text"
+
+        if chars is None:
+            lines = ["".join(text.text or "" for text in line.iter(text_tag)).rstrip("\n")
+                     for line in page.iter(line_tag)]
+        else:
+            lines = reconstruct_page(*chars, page_width=page_width, **kwargs)
+        yield page_number, lines
+
+        # free the processed page
+        page.clear()
+        while page.getprevious() is not None:
+            del page.getparent()[0]
+
+
+def main():
+    argparser = argparse.ArgumentParser(description='Reconstruct the column layout of pdf2txt XML or TETML pages.')
+
+    argparser.add_argument(
+        '-i', '--input_file',
+        type=str,
+        default='',
+        help='pass input file (pdf2txt XML or TETML)')
+
+    argparser.add_argument(
+        '-o', '--output_file',
+        type=str,
+        default='',
+        help='pass output file (to overwrite)')
+
+    argparser.add_argument(
+        '--col_gap',
+        type=float,
+        default=1.5,
+        help='minimal gap between columns, in multiples of the median font size')
+
+    argparser.add_argument(
+        '--row_tolerance',
+        type=float,
+        default=0.5,
+        help='maximal baseline difference within a row, in multiples of the median font size')
+
+    args = argparser.parse_args()
+
+    start = time.time()
+    n_pages = 0
+    with open(args.input_file, "rb") as infile, open(args.output_file, "w", encoding="utf-8") as outfile:
+        for page_number, lines in iter_pages(infile, col_gap=args.col_gap, row_tolerance=args.row_tolerance):
+            for line in lines:
+                outfile.write("{}\n".format(line))
+            n_pages += 1
+
+    elapsed = time.time() - start
+    print(">> reconstructed {} pages in {:.2f}s ({:.0f} pages/s)".format(n_pages, elapsed, n_pages / max(elapsed, 1e-9)))
+
+
+if __name__ == '__main__':
+    main()
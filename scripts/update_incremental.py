@@ -0,0 +1,284 @@
+# usr/bin/env python3
+# author: Isabel Meraner
+# Project: Extraction of vernacular names from Bosshard (1978)
+# 2019
+
+"""
+Incrementally update the extracted triples after hand-corrections of the OCR input files.
+
+A fingerprint manifest keeps one hash per KANTON section of the geo file and one hash per line
+of the corrected authorship file. Only sections / lines whose fingerprint changed are passed
+through get_triples resp. the authorship extraction again, the results of all unchanged parts
+are taken from the manifest. vern-canton.json, vern-loc.json and the triple files are then
+rewritten from the merged results; they are the same as after a full run of get_vern_names.py
+resp. add_authorship_triples.py.
+
+Only these TSV / JSON intermediates are updated. The RDF layer is out of scope: generate_rdf_triples.py
+still has to be re-run on the updated json files to regenerate the graph.
+
+# How to run the code:
+$ python3 scripts/update_incremental.py -g resources/geo-latin-vernacular.txt -i resources/bosshard_out_corrected.txt -a Bosshard_Hans_Heinrich -s stoplist/swisstopo_short.txt -l stoplist/lat_genus.txt -o triples/
+
+# Keep applying corrections whenever one of the input files is saved:
+$ python3 scripts/update_incremental.py -g resources/geo-latin-vernacular.txt -i resources/bosshard_out_corrected.txt -a Bosshard_Hans_Heinrich -s stoplist/swisstopo_short.txt -l stoplist/lat_genus.txt -o triples/ --watch
+
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from get_vern_names import get_triples, _read_stoplist, _clean_dict
+from add_authorship_triples import get_authorship_triple
+
+
+def _fingerprint(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _fingerprint_stoplists(*stoplists):
+    return _fingerprint("\n".join("\t".join(sorted(stopwords)) for stopwords in stoplists))
+
+
+def _load_manifest(manifest_path):
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as fp:
+            return json.load(fp)
+    return {"geo": {}, "authorship": {}}
+
+
+def _write_file(path, content):
+    # write to a temporary file first, so that readers never see a half-written output
+    tmp_path = "{}.tmp".format(path)
+    with open(tmp_path, "w", encoding="utf-8") as out_file:
+        out_file.write(content)
+    os.replace(tmp_path, path)
+
+
+def _split_sections(lines):
+    """Split the geo file into sections, each starting with a KANTON header."""
+    sections = []
+    current = []
+    for line in lines:
+        split_line = line.rstrip("\n").rstrip(",").split(" ")
+        if split_line[0].isupper() and current:
+            sections.append(current)
+            current = []
+        current.append(line)
+    if current:
+        sections.append(current)
+
+    return sections
+
+
+def update_geo_triples(geo_file, path_out, manifest, geo_stopwords, latin_stopwords):
+    stoplist_key = _fingerprint_stoplists(geo_stopwords, latin_stopwords)
+    cached_sections = manifest.get("sections", {})
+    if manifest.get("stoplists") != stoplist_key:
+        cached_sections = {}
+
+    with open(geo_file, "r") as geo:
+        sections = _split_sections(geo)
+
+    section_hashes = []
+    new_cache = {}
+    changed = 0
+    for section in sections:
+        section_hash = _fingerprint("".join(section))
+        section_hashes.append(section_hash)
+        if section_hash in new_cache:
+            continue
+        elif section_hash in cached_sections:
+            new_cache[section_hash] = cached_sections[section_hash]
+        else:
+            total_geotriples, _, _, vern_loc, last_added = get_triples(section, geo_stopwords, latin_stopwords)
+            new_cache[section_hash] = {
+                "triples": sorted(total_geotriples),
+                "vern_loc": [[name, loc] for name, locs in vern_loc.items() for loc in locs],
+                "basel": section[0].rstrip("\n").rstrip(",") == "KANTON BASEL-LANDSCHAFT",
+                "last_added": last_added,
+            }
+            changed += 1
+
+    print(">> reprocessed {} of {} section(s) in {}".format(changed, len(section_hashes), geo_file))
+    if not changed and section_hashes == manifest.get("order"):
+        return False
+
+    # merge in file order, like get_triples over the whole file: a BASEL-LANDSCHAFT header drops the triple
+    # added by the last line of the previous section, if that triple was new at that point
+    total_geotriples = set()
+    vern_loc = defaultdict(list)
+    last_added = None
+    for section_hash in section_hashes:
+        section = new_cache[section_hash]
+        if section["basel"] and last_added is not None:
+            total_geotriples.discard(last_added)
+        last_added = section["last_added"]
+        if last_added in total_geotriples:
+            last_added = None
+        total_geotriples.update(section["triples"])
+        for name, loc in section["vern_loc"]:
+            vern_loc[name].append(loc)
+
+    canton_vern = defaultdict(list)
+    for tr in sorted(total_geotriples):
+        area_coarse, _, name = tr.rstrip("\n").split("\t")
+        canton_vern[name].append(area_coarse)
+
+    _write_file(os.path.join(path_out, "geo-vern_triples.tsv"), "".join(sorted(total_geotriples)))
+    _write_file(os.path.join(path_out, "vern-canton.json"), json.dumps(canton_vern))
+    _write_file(os.path.join(path_out, "vern-loc.json"), json.dumps(_clean_dict(vern_loc)))
+
+    manifest["stoplists"] = stoplist_key
+    manifest["order"] = section_hashes
+    manifest["sections"] = new_cache
+
+    return True
+
+
+def update_authorship_triples(input_file, output_file, manifest, author, latin_stopwords):
+    stoplist_key = _fingerprint_stoplists(latin_stopwords)
+    old_hashes = manifest.get("lines", [])
+    old_triples = manifest.get("triples", [])
+    if manifest.get("stoplists") != stoplist_key or manifest.get("author") != author:
+        old_hashes = []
+        old_triples = []
+
+    with open(input_file, "r") as infile:
+        lines = infile.readlines()
+    new_hashes = [_fingerprint(line) for line in lines]
+
+    new_triples = []
+    changed = 0
+    matcher = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            new_triples.extend(old_triples[i1:i2])
+        else:
+            for line in lines[j1:j2]:
+                new_triples.append(get_authorship_triple(line, author, latin_stopwords))
+            changed += max(i2 - i1, j2 - j1)
+
+    print(">> reprocessed {} of {} line(s) in {}".format(changed, len(lines), input_file))
+    if not changed and os.path.exists(output_file):
+        return False
+
+    _write_file(output_file, "".join(triple for triple in new_triples if triple is not None))
+
+    manifest["stoplists"] = stoplist_key
+    manifest["author"] = author
+    manifest["lines"] = new_hashes
+    manifest["triples"] = new_triples
+
+    return True
+
+
+def _get_mtimes(*paths):
+    """Return the modification times of the input files, or None while one of them is missing."""
+    try:
+        return [os.stat(path).st_mtime_ns for path in paths if path]
+    except FileNotFoundError:
+        # editors that save via a temporary file and rename leave a short gap, retry on the next poll
+        return None
+
+
+def main():
+    argparser = argparse.ArgumentParser(description='Incrementally update extracted triples after input corrections.')
+
+    argparser.add_argument(
+        '-g', '--geo_file',
+        type=str,
+        default='',
+        help='pass input file with geo snippet')
+
+    argparser.add_argument(
+        '-i', '--input_file',
+        type=str,
+        default='',
+        help='pass corrected input file with vernacular names (authorship triples)')
+
+    argparser.add_argument(
+        '-a', '--author',
+        type=str,
+        default='',
+        help='pass author name')
+
+    argparser.add_argument(
+        '-s', '--stoplist',
+        type=str,
+        default='',
+        help='pass stoplist gazetteer to block geogr. names')
+
+    argparser.add_argument(
+        '-l', '--latin',
+        type=str,
+        default='',
+        help='pass stoplist gazetteer to block latin names')
+
+    argparser.add_argument(
+        '-o', '--output_path',
+        type=str,
+        default='./triples/',
+        help='pass output directory for triples and json files')
+
+    argparser.add_argument(
+        '-m', '--manifest',
+        type=str,
+        default='',
+        help='pass fingerprint manifest (default: <output_path>/incremental-manifest.json)')
+
+    argparser.add_argument(
+        '-w', '--watch',
+        action='store_true',
+        help='keep running and apply changes whenever an input file is saved')
+
+    argparser.add_argument(
+        '--interval',
+        type=float,
+        default=1.0,
+        help='polling interval in seconds for --watch')
+
+    args = argparser.parse_args()
+    geo_file = args.geo_file
+    input_file = args.input_file
+    author = args.author
+    path_out = args.output_path
+    manifest_path = args.manifest or os.path.join(path_out, "incremental-manifest.json")
+
+    geo_stopwords = _read_stoplist(args.stoplist)
+    latin_stopwords = _read_stoplist(args.latin)
+    authorship_out = os.path.join(path_out, "authorship-vern-triples.tsv")
+
+    manifest = _load_manifest(manifest_path)
+    last_mtimes = None
+
+    while True:
+        mtimes = _get_mtimes(geo_file, input_file)
+        if mtimes is None and not args.watch:
+            argparser.error("input file not found")
+        if mtimes is not None and mtimes != last_mtimes:
+            start = time.time()
+            updated = False
+            if geo_file:
+                updated |= update_geo_triples(geo_file, path_out, manifest["geo"], geo_stopwords, latin_stopwords)
+            if input_file:
+                updated |= update_authorship_triples(input_file, authorship_out, manifest["authorship"], author,
+                                                     latin_stopwords)
+            if updated:
+                _write_file(manifest_path, json.dumps(manifest))
+
+            print(">> update finished in {:.3f}s".format(time.time() - start))
+            last_mtimes = mtimes
+
+        if not args.watch:
+            break
+        try:
+            time.sleep(args.interval)
+        except KeyboardInterrupt:
+            break
+
+
+if __name__ == '__main__':
+    main()
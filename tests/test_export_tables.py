@@ -0,0 +1,65 @@
+"""
+Round-trip tests for scripts/export_tables.py on the json files of the repository.
+
+$ python3 -m pytest tests/
+"""
+import os
+import sys
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "scripts"))
+
+from export_tables import (OccurrenceRows, OCCURRENCE_COLUMNS, NAME_MAPS, STRING_TYPE, name_map_table, write_table,
+                           read_table)
+from generate_rdf_triples import load_json_data, load_geo_information, build_graph
+from rdflib import Graph, URIRef
+from rdflib.namespace import RDF
+
+
+@pytest.fixture(scope="module")
+def data_storage():
+    return load_json_data(os.path.join(REPO_DIR, "json", ""))
+
+
+@pytest.fixture(scope="module")
+def occurrence_graph(data_storage):
+    geo_storage = load_geo_information(os.path.join(REPO_DIR, "resources", "loc-cantons.tsv"))
+    rows = OccurrenceRows()
+    g = Graph()
+    for sink in (rows, g):
+        with open(os.path.join(REPO_DIR, "resources", "authorship-vern-triples_unique_sorted.tsv"), "r") as vern_names:
+            build_graph(sink, data_storage, geo_storage, vern_names, "")
+    return rows, g
+
+
+def _assert_round_trip(table, tmp_path, name):
+    write_table(table, str(tmp_path), name, "both")
+    for extension in ("arrow", "parquet"):
+        read = read_table(str(tmp_path / "{}.{}".format(name, extension)))
+        assert read.num_rows == table.num_rows
+        assert read.schema.names == table.schema.names
+        assert all(field.type == STRING_TYPE for field in read.schema)
+        assert read.to_pydict() == table.to_pydict()
+
+
+def test_occurrences_round_trip(occurrence_graph, tmp_path):
+    rows, g = occurrence_graph
+    table = rows.to_table()
+
+    # one row per occurrence, every column filled from the statements of that occurrence
+    occurrences = set(g.subjects(RDF.type, URIRef(":NameOccurrence")))
+    assert table.num_rows == len(occurrences)
+    assert table.schema.names == [column for column, _ in OCCURRENCE_COLUMNS]
+    for column in ("name", "status", "taxon", "source"):
+        assert table.column(column).null_count == 0
+
+    _assert_round_trip(table, tmp_path, "occurrences")
+
+
+@pytest.mark.parametrize("map_name", NAME_MAPS)
+def test_name_maps_round_trip(data_storage, map_name, tmp_path):
+    table = name_map_table(data_storage[map_name], map_name)
+    assert table.num_rows == sum(len(values) for values in data_storage[map_name].values())
+
+    _assert_round_trip(table, tmp_path, map_name)
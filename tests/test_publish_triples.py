@@ -0,0 +1,256 @@
+"""
+Tests for scripts/publish_triples.py against a local stand-in SPARQL endpoint (http.server), which fails some
+requests with 503 or by dropping the connection.
+
+$ python3 -m pytest tests/
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pytest
+import requests
+from rdflib import Graph
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "scripts"))
+
+import publish_triples
+from publish_triples import BatchUploader
+from generate_rdf_triples import load_json_data, load_geo_information, build_graph
+
+BASE_URL = "http://www.catalogueoflife.org/col/webservice?format=json&response=full&name="
+
+
+class StandInEndpoint:
+    """
+    Local endpoint accepting Graph Store Protocol and SPARQL Update POSTs. fail(n) decides per request number n
+    (counted from 0) whether to answer "503", "drop" the connection, answer "400" or accept the request.
+    """
+
+    def __init__(self, fail=lambda n: None):
+        self.requests = []
+        self.accepted = []
+        self.lock = threading.Lock()
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+                with endpoint.lock:
+                    n = len(endpoint.requests)
+                    request = (urlparse(self.path), self.headers["Content-Type"], body)
+                    endpoint.requests.append(request)
+                    outcome = fail(n)
+                    if outcome is None:
+                        endpoint.accepted.append(request)
+
+                if outcome == "drop":
+                    self.close_connection = True
+                    return
+                status = {"503": 503, "400": 400}.get(outcome, 204)
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:{}/ds".format(self.server.server_address[1])
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StatementList(list):
+    add = list.append
+
+
+def _load_input():
+    data_storage = load_json_data(os.path.join(REPO_DIR, "json", ""))
+    geo_storage = load_geo_information(os.path.join(REPO_DIR, "resources", "loc-cantons.tsv"))
+    return data_storage, geo_storage
+
+
+@pytest.fixture(scope="module")
+def graph_input():
+    return _load_input()
+
+
+def _build(sink, graph_input):
+    data_storage, geo_storage = graph_input
+    with open(os.path.join(REPO_DIR, "resources", "authorship-vern-triples_unique_sorted.tsv"), "r") as vern_names:
+        build_graph(sink, data_storage, geo_storage, vern_names, BASE_URL)
+
+
+@pytest.fixture(scope="module")
+def expected(graph_input):
+    statements = StatementList()
+    _build(statements, graph_input)
+    return statements
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(publish_triples.time, "sleep", lambda seconds: None)
+
+
+def _upload(endpoint, graph_input, **kwargs):
+    with BatchUploader(endpoint.url, **kwargs) as uploader:
+        _build(uploader, graph_input)
+    return uploader
+
+
+def _parse_turtle(text):
+    return set(Graph().parse(data=text, format="turtle"))
+
+
+def _gsp_statements(requests):
+    statements = set()
+    for _, _, body in requests:
+        statements |= _parse_turtle(body)
+    return statements
+
+
+def test_statement_stream_is_deterministic(expected):
+    # a resumed upload relies on every batch holding the same statements as in the interrupted run,
+    # also with another string hash seed
+    script = ("import sys; sys.path.insert(0, {!r}); import test_publish_triples as t; "
+              "s = t.StatementList(); t._build(s, t._load_input()); "
+              "print('\\n'.join('{{}} {{}} {{}}'.format(*statement) for statement in s))"
+              ).format(os.path.dirname(os.path.abspath(__file__)))
+    streams = set()
+    for seed in ("1", "2", "3"):
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        streams.add(subprocess.run([sys.executable, "-c", script], env=env, check=True, capture_output=True,
+                                   text=True).stdout)
+
+    assert len(streams) == 1
+    assert streams.pop().splitlines() == ["{} {} {}".format(*statement) for statement in expected]
+
+
+def test_gsp_batches_and_retries(graph_input, expected):
+    # every 3rd request fails with 503, every 7th drops the connection
+    fail = lambda n: "503" if n % 3 == 1 else "drop" if n % 7 == 5 else None
+    with StandInEndpoint(fail) as endpoint:
+        uploader = _upload(endpoint, graph_input, batch_size=1000, workers=3)
+
+    n_batches = -(-len(expected) // 1000)
+    assert uploader.batch_index == n_batches
+    assert uploader.uploaded == len(expected)
+    assert uploader.skipped == 0
+
+    # failed batches were re-sent, each batch arrived once
+    assert len(endpoint.requests) > len(endpoint.accepted) == n_batches
+    for url, content_type, body in endpoint.accepted:
+        assert url.path == "/ds"
+        assert parse_qs(url.query, keep_blank_values=True) == {"default": [""]}
+        assert content_type == "text/turtle; charset=utf-8"
+        assert 0 < len(body.splitlines()) <= 1000
+
+    assert _gsp_statements(endpoint.accepted) == set(expected)
+
+
+def test_gsp_named_graph(graph_input):
+    with StandInEndpoint() as endpoint:
+        _upload(endpoint, graph_input, batch_size=5000, graph_uri="https://vernacular.plazi.org/graph")
+
+    for url, _, _ in endpoint.accepted:
+        assert parse_qs(url.query) == {"graph": ["https://vernacular.plazi.org/graph"]}
+
+
+@pytest.mark.parametrize("graph_uri", ["", "https://vernacular.plazi.org/graph"])
+def test_update_insert_data(graph_input, expected, graph_uri):
+    fail = lambda n: "503" if n == 0 else "drop" if n == 2 else None
+    with StandInEndpoint(fail) as endpoint:
+        _upload(endpoint, graph_input, protocol="update", graph_uri=graph_uri, batch_size=2000, workers=1)
+
+    statements = set()
+    for url, content_type, body in endpoint.accepted:
+        assert url.query == ""
+        assert content_type == "application/sparql-update; charset=utf-8"
+        if graph_uri:
+            prefix, suffix = "INSERT DATA {{ GRAPH <{}> {{\n".format(graph_uri), "} }"
+        else:
+            prefix, suffix = "INSERT DATA {\n", "}"
+        assert body.startswith(prefix) and body.endswith(suffix)
+        # the data block of INSERT DATA uses the Turtle syntax for triples
+        statements |= _parse_turtle(body[len(prefix):-len(suffix)])
+
+    assert len(endpoint.accepted) == -(-len(expected) // 2000)
+    assert statements == set(expected)
+
+
+def test_resume_from_checkpoint(graph_input, expected, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    # the endpoint goes away after 3 batches
+    with StandInEndpoint(lambda n: "400" if n >= 3 else None) as endpoint:
+        with pytest.raises(requests.HTTPError):
+            _upload(endpoint, graph_input, batch_size=1000, workers=1, retries=1, checkpoint=checkpoint)
+    first = endpoint.accepted
+    with open(checkpoint, "r") as fp:
+        assert sorted(json.load(fp)["done_batches"]) == ["0", "1", "2"]
+
+    with StandInEndpoint() as endpoint:
+        uploader = _upload(endpoint, graph_input, batch_size=1000, workers=2, checkpoint=checkpoint)
+
+    assert uploader.skipped == 3000
+    assert uploader.uploaded == len(expected) - 3000
+    assert len(endpoint.accepted) == uploader.batch_index - 3
+    assert _gsp_statements(first) | _gsp_statements(endpoint.accepted) == set(expected)
+    assert not _gsp_statements(first) & _gsp_statements(endpoint.accepted)
+
+
+def test_resume_refuses_changed_batches(graph_input, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    with StandInEndpoint() as endpoint:
+        _upload(endpoint, graph_input, batch_size=1000, checkpoint=checkpoint)
+
+    # same checkpoint, other batch boundaries
+    with StandInEndpoint() as endpoint:
+        with pytest.raises(ValueError):
+            _upload(endpoint, graph_input, batch_size=900, checkpoint=checkpoint)
+    assert not endpoint.requests
+
+
+def test_stop_after_failed_batch(graph_input, expected):
+    # the endpoint is down for good: stop at the first failed batch instead of retrying every following one
+    with StandInEndpoint(lambda n: "503") as endpoint:
+        with pytest.raises(requests.HTTPError):
+            _upload(endpoint, graph_input, batch_size=500, workers=1, retries=2)
+
+    n_batches = -(-len(expected) // 500)
+    # the failed batch and the batches already in flight (at most 2 per worker), each with all its attempts
+    assert len(endpoint.requests) <= 3 * 3 < 3 * n_batches
+
+
+def test_shutdown_after_changed_batch(graph_input, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    with open(checkpoint, "w") as fp:
+        json.dump({"done_batches": {"3": "0" * 40}}, fp)
+
+    with StandInEndpoint() as endpoint:
+        uploader = BatchUploader(endpoint.url, batch_size=1000, workers=2, checkpoint=checkpoint)
+        with pytest.raises(ValueError):
+            with uploader:
+                _build(uploader, graph_input)
+
+    # the executor has been shut down
+    with pytest.raises(RuntimeError):
+        uploader.executor.submit(print)
+    assert all(future.done() for future in uploader.futures)
+    # batches 0 - 2 went out before batch 3 was found to differ, nothing after it
+    assert len(endpoint.accepted) <= 3
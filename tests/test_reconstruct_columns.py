@@ -0,0 +1,110 @@
+"""
+Tests for scripts/reconstruct_columns.py on pdf2txt XML, laid out like the output of
+$ pdf2txt.py -t xml -M 40 page.pdf
+where the layout analysis merges everything on a baseline into one textline.
+
+$ python3 -m pytest tests/
+"""
+import io
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "scripts"))
+
+from reconstruct_columns import iter_pages
+from get_vern_names import get_triples
+
+CHAR_WIDTH = 5.5
+SIZE = 10.0
+LEADING = 14.0
+TOP = 777.93
+
+LEFT = ["KANTON ZÜRICH", "Schnääball Wädenswil", "Wysshulftere Horgen", "Gingelbeeri Thalwil"]
+RIGHT = ["KANTON BERN", "Schwälkenholz Ob. Emmental", "Hülftere Thun"]
+
+
+def _chars(text, x, y):
+    elements = []
+    for i, char in enumerate(text):
+        x0 = x + i * CHAR_WIDTH
+        elements.append('<text font="Helvetica" bbox="{:.3f},{:.3f},{:.3f},{:.3f}" colourspace="DeviceGray" '
+                        'ncolour="0" size="{:.3f}">{}</text>'.format(x0, y, x0 + CHAR_WIDTH, y + SIZE, SIZE, char))
+    return elements
+
+
+def _pdf2txt_xml(pages):
+    """pages: list of pages, each a list of (text, x, y); texts on the same y end up in one textline."""
+    xml_pages = []
+    for page_id, cells in enumerate(pages, 1):
+        textlines = []
+        for y in sorted({y for _, _, y in cells}, reverse=True):
+            elements = []
+            for text, x, _ in sorted(cell for cell in cells if cell[2] == y):
+                # the spaces / line break of the layout analysis have no bbox
+                if elements:
+                    elements.append("<text> </text>")
+                elements.extend(_chars(text, x, y))
+            elements.append("<text>\n</text>")
+            textlines.append('<textline bbox="60.000,{0:.3f},540.000,{1:.3f}">\n{2}\n</textline>'.format(
+                y, y + SIZE, "\n".join(elements)))
+        xml_pages.append('<page id="{}" bbox="0.000,0.000,595.000,842.000" rotate="0">\n<textbox id="0" '
+                         'bbox="60.000,60.000,540.000,800.000">\n{}\n</textbox>\n</page>'.format(
+                             page_id, "\n".join(textlines)))
+
+    xml = '<?xml version="1.0" encoding="utf-8" ?>\n<pages>\n{}\n</pages>\n'.format("\n".join(xml_pages))
+    return io.BytesIO(xml.encode("utf-8"))
+
+
+def _two_columns(top=TOP):
+    # the right column is set independently of the left one, its baselines are half a line lower
+    return ([(text, 60, top - LEADING * i) for i, text in enumerate(LEFT)] +
+            [(text, 320, top - LEADING * (i + 0.5)) for i, text in enumerate(RIGHT)])
+
+
+def test_two_columns():
+    pages = list(iter_pages(_pdf2txt_xml([_two_columns(), _two_columns()])))
+
+    assert [page_number for page_number, _ in pages] == [1, 2]
+    for _, lines in pages:
+        assert lines == LEFT + RIGHT
+
+
+def test_full_width_title():
+    title = "MUNDARTNAMEN VON BÄUMEN UND STRÄUCHERN IN DER SCHWEIZ UND IM FÜRSTENTUM"
+    caption = "Tabelle 3: Verbreitung der Namen in der deutschsprachigen Schweiz nach Kantonen"
+    cells = [(title, 60, TOP + 2 * LEADING)] + _two_columns() + [(caption, 60, TOP - 6 * LEADING)]
+    [(_, lines)] = iter_pages(_pdf2txt_xml([cells]))
+
+    assert lines == [title] + LEFT + RIGHT + [caption]
+
+
+def test_table_rows():
+    table = [("MUNDARTNAMEN", "ORTE", "EHB", "INDEX"),
+             ("KANTON BERN",),
+             ("Wisstanne", "Oberwil", "50", "l"),
+             ("Danne", "Oberbaselbiet", "54", "ll"),
+             ("Tanne", "Liestal", "73", "lll")]
+    cells = [(text, x, TOP - LEADING * i) for i, row in enumerate(table) for text, x in zip(row, (60, 200, 400, 470))]
+    [(_, lines)] = iter_pages(_pdf2txt_xml([cells]))
+
+    assert lines == [" ".join(row) for row in table]
+
+    # the output can be read by get_triples
+    total_geotriples, _, _, vern_loc, _ = get_triples([line + "\n" for line in lines], set(), set())
+    assert total_geotriples == {"KANTON BERN\tuses_vernacular_name\t{}\n".format(name)
+                                for name in ("Wisstanne", "Danne", "Tanne")}
+    assert vern_loc["Wisstanne"] == ["Oberwil_l"]
+
+
+def test_tetml_without_glyphs_keeps_line_order():
+    with open(os.path.join(REPO_DIR, "resources", "bosshard_1978_OCR.tetml"), "rb") as tetml_file:
+        pages = iter_pages(tetml_file)
+        first_pages = [next(pages) for _ in range(2)]
+
+    assert first_pages == [
+        (1, ["Hans Heinrich Bosshard", "Mundartnamen", "von Bäumen", "und Stauchern", "in der deutschsprachigen",
+             "Schweiz und im", "Fürstentum Liechtenstein"]),
+        (2, ["Hans Heinrich Bosshard :", "Mundartnamen von Bäumen und Sträuchern",
+             "in der deutschsprachigen Schweiz und im Fürstentum Liechtenstein"]),
+    ]
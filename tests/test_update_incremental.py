@@ -0,0 +1,187 @@
+"""
+Tests for scripts/update_incremental.py: after editing the input files, the incremental update has to give the
+same output as a full run of get_triples resp. the authorship extraction.
+
+$ python3 -m pytest tests/
+"""
+import json
+import os
+import sys
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "scripts"))
+
+from update_incremental import update_geo_triples, update_authorship_triples
+from get_vern_names import get_triples, _read_stoplist, _clean_dict
+from add_authorship_triples import get_authorship_triple
+
+GEO_FILE = os.path.join(REPO_DIR, "resources", "geo-latin-vernacular.txt")
+AUTHORSHIP_FILE = os.path.join(REPO_DIR, "resources", "bosshard_out_corrected.txt")
+AUTHOR = "Bosshard_Hans_Heinrich"
+BASEL = "KANTON BASEL-LANDSCHAFT\n"
+# a species heading with an OCR error, which is not in the latin stoplist
+HEADING = "Pimis montana Mill. Berg-Föhre\n"
+
+
+@pytest.fixture(scope="module")
+def stopwords():
+    return (_read_stoplist(os.path.join(REPO_DIR, "stoplist", "swisstopo_short.txt")),
+            _read_stoplist(os.path.join(REPO_DIR, "stoplist", "lat_genus.txt")))
+
+
+def _read_lines(path):
+    with open(path, "r") as infile:
+        return infile.readlines()
+
+
+def _write_lines(path, lines):
+    with open(path, "w", encoding="utf-8") as outfile:
+        outfile.writelines(lines)
+
+
+def _heading_before(lines, header_index):
+    """Return the index of the last non-blank line before lines[header_index]."""
+    i = header_index - 1
+    while lines[i] == "\n":
+        i -= 1
+    return i
+
+
+def _basel_headers(lines):
+    return [i for i, line in enumerate(lines) if line == BASEL]
+
+
+def _edit_heading(lines):
+    i = _heading_before(lines, _basel_headers(lines)[4])
+    lines[i] = HEADING
+
+
+def _delete_heading(lines):
+    del lines[_heading_before(lines, _basel_headers(lines)[4])]
+
+
+def _duplicate_heading(lines):
+    i = _heading_before(lines, _basel_headers(lines)[4])
+    lines[i:i + 1] = [HEADING, HEADING]
+
+
+def _delete_basel_header(lines):
+    i = _basel_headers(lines)[4]
+    lines[_heading_before(lines, i)] = HEADING
+    del lines[i]
+
+
+def _duplicate_basel_header(lines):
+    i = _basel_headers(lines)[4]
+    lines[_heading_before(lines, i)] = HEADING
+    lines[i:i + 1] = [BASEL, HEADING, BASEL]
+
+
+def _move_heading_after_header(lines):
+    i = _basel_headers(lines)[4]
+    lines[i + 1:i + 1] = [HEADING]
+
+
+def _edit_everywhere(lines):
+    for n, i in enumerate(_basel_headers(lines)[::7]):
+        lines[_heading_before(lines, i)] = "Neuname{} Ort\n".format(n)
+    del lines[200:210]
+    lines[1000:1000] = lines[500:520]
+
+
+GEO_EDITS = [_edit_heading, _delete_heading, _duplicate_heading, _delete_basel_header, _duplicate_basel_header,
+             _move_heading_after_header, _edit_everywhere]
+
+
+def _full_run(geo_file, stopwords):
+    with open(geo_file, "r") as geo:
+        total_geotriples, _, _, vern_loc, _ = get_triples(geo, *stopwords)
+
+    canton_vern = {}
+    for tr in total_geotriples:
+        area_coarse, _, name = tr.rstrip("\n").split("\t")
+        canton_vern.setdefault(name, []).append(area_coarse)
+
+    return sorted(total_geotriples), canton_vern, _clean_dict(vern_loc)
+
+
+def _incremental_output(path_out):
+    with open(os.path.join(path_out, "vern-canton.json"), "r") as fp:
+        canton_vern = json.load(fp)
+    with open(os.path.join(path_out, "vern-loc.json"), "r") as fp:
+        vern_loc = json.load(fp)
+
+    return _read_lines(os.path.join(path_out, "geo-vern_triples.tsv")), canton_vern, vern_loc
+
+
+def _assert_same_as_full_run(geo_file, path_out, stopwords):
+    triples, canton_vern, vern_loc = _full_run(geo_file, stopwords)
+    inc_triples, inc_canton_vern, inc_vern_loc = _incremental_output(path_out)
+
+    assert inc_triples == triples
+    assert {k: sorted(v) for k, v in inc_canton_vern.items()} == {k: sorted(v) for k, v in canton_vern.items()}
+    assert inc_vern_loc == vern_loc
+
+    return triples
+
+
+@pytest.mark.parametrize("edit", GEO_EDITS, ids=[edit.__name__.lstrip("_") for edit in GEO_EDITS])
+def test_geo_update_matches_full_run(edit, stopwords, tmp_path):
+    geo_file = str(tmp_path / "geo.txt")
+    lines = _read_lines(GEO_FILE)
+    _write_lines(geo_file, lines)
+
+    manifest = {}
+    assert update_geo_triples(geo_file, str(tmp_path), manifest, *stopwords)
+    _assert_same_as_full_run(geo_file, str(tmp_path), stopwords)
+
+    edit(lines)
+    _write_lines(geo_file, lines)
+    assert update_geo_triples(geo_file, str(tmp_path), manifest, *stopwords)
+    triples = _assert_same_as_full_run(geo_file, str(tmp_path), stopwords)
+
+    if edit in (_edit_heading, _duplicate_basel_header):
+        # the heading before a BASEL-LANDSCHAFT header is dropped again
+        assert not any(triple.endswith("\tPimis\n") for triple in triples)
+    elif edit is _delete_basel_header:
+        # without the header, the heading is an ordinary line of the previous canton
+        assert any(triple.endswith("\tPimis\n") for triple in triples)
+
+    # nothing changed since the last update
+    assert not update_geo_triples(geo_file, str(tmp_path), manifest, *stopwords)
+
+
+def _insert_lines(lines):
+    lines[10:10] = ["Neuname\n", "\n", lines[3]]
+
+
+def _delete_lines(lines):
+    del lines[50:60]
+    del lines[0]
+
+
+def _edit_lines(lines):
+    lines[100] = "Neuname\n"
+    lines[-1] = "Letzter Name\n"
+
+
+AUTHORSHIP_EDITS = [_insert_lines, _delete_lines, _edit_lines]
+
+
+@pytest.mark.parametrize("edit", AUTHORSHIP_EDITS, ids=[edit.__name__.lstrip("_") for edit in AUTHORSHIP_EDITS])
+def test_authorship_update_matches_full_run(edit, stopwords, tmp_path):
+    input_file = str(tmp_path / "authorship.txt")
+    output_file = str(tmp_path / "authorship-vern-triples.tsv")
+    lines = _read_lines(AUTHORSHIP_FILE)
+    _write_lines(input_file, lines)
+
+    manifest = {}
+    assert update_authorship_triples(input_file, output_file, manifest, AUTHOR, stopwords[1])
+
+    edit(lines)
+    _write_lines(input_file, lines)
+    assert update_authorship_triples(input_file, output_file, manifest, AUTHOR, stopwords[1])
+
+    triples = (get_authorship_triple(line, AUTHOR, stopwords[1]) for line in lines)
+    assert _read_lines(output_file) == [triple for triple in triples if triple is not None]